@@ -6,11 +6,14 @@ Multi-cloud orchestration with self-healing at continental scale.
 
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional, Set
+from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
+from collections import defaultdict
 from enum import Enum
-import time
-import random
+import heapq
+import itertools
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +33,14 @@ class RegionStatus(Enum):
     OFFLINE = "offline"
 
 
-@dataclass
+# Integer status codes for the routing arrays; HEALTHY maps to 0
+_STATUS_CODES = {status: code for code, status in enumerate(RegionStatus)}
+
+# Datacenters at or above this fraction of capacity receive no new traffic
+_ROUTABLE_LOAD = 0.9
+
+
+@dataclass(slots=True)
 class DataCenter:
     id: str
     provider: CloudProvider
@@ -41,9 +51,15 @@ class DataCenter:
     status: RegionStatus = RegionStatus.HEALTHY
     latency_ms: float = 0.0
     uptime: float = 100.0
+    _inv_capacity: float = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        if self.capacity <= 0:
+            raise ValueError(f"Datacenter {self.id} capacity must be positive, got {self.capacity}")
+        self._inv_capacity = 1.0 / self.capacity
 
 
-@dataclass
+@dataclass(slots=True)
 class ServiceInstance:
     id: str
     service_name: str
@@ -55,13 +71,45 @@ class ServiceInstance:
 
 
 class MultiCloudOrchestrator:
-    """Orchestrates resources across multiple cloud providers"""
+    """Orchestrates resources across multiple cloud providers
+    
+    Datacenter load/status and service health are mirrored into arrays used
+    for routing and healing. Add and remove records with add_datacenter,
+    remove_datacenter and remove_service, and change them through
+    set_datacenter_load, set_datacenter_status and report_service_health;
+    editing the datacenters/services dicts or the fields on DataCenter or
+    ServiceInstance records directly is not seen by either.
+    """
     
-    def __init__(self):
+    def __init__(self, rng: Optional[np.random.Generator] = None):
         self.datacenters: Dict[str, DataCenter] = {}
         self.services: Dict[str, ServiceInstance] = {}
+        # Instance ids per service name, in deploy order (values unused)
+        self.services_by_name: Dict[str, Dict[str, None]] = defaultdict(dict)
         self.total_users = 0
         self.global_traffic = 0
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self._instance_counter = itertools.count()
+        
+        # Struct-of-arrays mirror of datacenter state used for routing
+        self._dc_ids: List[str] = []
+        self._dc_index: Dict[str, int] = {}
+        self._load = np.empty(0, dtype=np.int64)
+        self._capacity = np.empty(0, dtype=np.int64)
+        self._inv_capacity = np.empty(0, dtype=np.float64)
+        self._latency = np.empty(0, dtype=np.float64)
+        self._status = np.empty(0, dtype=np.int8)
+        
+        # Min-heap of (latency, index, version) over routable datacenters;
+        # entries whose version is behind _dc_version are stale
+        self._route_heap: List[tuple] = []
+        self._dc_version: List[int] = []
+        
+        # Service health by slot; free slots hold 1.0 so they never look unhealthy
+        self._service_slots: Dict[str, int] = {}
+        self._slot_ids: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+        self._service_health = np.ones(0, dtype=np.float64)
         
     def initialize_global_infrastructure(self):
         """Initialize data centers across all continents"""
@@ -80,7 +128,9 @@ class MultiCloudOrchestrator:
             ("ca-central-1", "Canada", CloudProvider.AWS),
         ]
         
-        for region, country, provider in regions:
+        latencies = self._rng.uniform(10, 100, len(regions))
+        
+        for (region, country, provider), latency in zip(regions, latencies.tolist()):
             dc_id = f"{provider.value}-{region}"
             self.datacenters[dc_id] = DataCenter(
                 id=dc_id,
@@ -88,39 +138,164 @@ class MultiCloudOrchestrator:
                 region=region,
                 country=country,
                 capacity=100000,
-                latency_ms=random.uniform(10, 100)
+                latency_ms=latency
             )
             
+        self._rebuild_arrays()
         logger.info(f"Initialized {len(self.datacenters)} global data centers")
         
+    def _rebuild_arrays(self):
+        """Rebuild the routing arrays from the datacenter records"""
+        dcs = list(self.datacenters.values())
+        self._dc_ids = [dc.id for dc in dcs]
+        self._dc_index = {dc_id: i for i, dc_id in enumerate(self._dc_ids)}
+        self._load = np.array([dc.current_load for dc in dcs], dtype=np.int64)
+        self._capacity = np.array([dc.capacity for dc in dcs], dtype=np.int64)
+        self._inv_capacity = np.array([dc._inv_capacity for dc in dcs], dtype=np.float64)
+        self._latency = np.array([dc.latency_ms for dc in dcs], dtype=np.float64)
+        self._status = np.array([_STATUS_CODES[dc.status] for dc in dcs], dtype=np.int8)
+        self._dc_version = [0] * len(dcs)
+        self._rebuild_route_heap()
+        
+    def _routable(self, idx):
+        """Whether the datacenter(s) at idx are healthy and below routable load"""
+        return (self._status[idx] == 0) & (self._load[idx] < _ROUTABLE_LOAD * self._capacity[idx])
+        
+    def _rebuild_route_heap(self):
+        """Rebuild the route heap from the arrays, dropping stale entries"""
+        routable = np.nonzero(self._routable(slice(None)))[0]
+        self._route_heap = [
+            (latency, i, self._dc_version[i])
+            for latency, i in zip(self._latency[routable].tolist(), routable.tolist())
+        ]
+        heapq.heapify(self._route_heap)
+        
+    def _sync_datacenter(self, dc: DataCenter):
+        """Write a datacenter's load and status through to the routing arrays"""
+        i = self._dc_index[dc.id]
+        self._load[i] = dc.current_load
+        self._status[i] = _STATUS_CODES[dc.status]
+        self._refresh_route(i)
+        
+    def _refresh_route(self, i: int):
+        """Invalidate datacenter i's heap entry and re-add it if still routable"""
+        self._dc_version[i] += 1
+        if len(self._route_heap) > 4 * len(self._dc_ids):
+            self._rebuild_route_heap()
+        elif self._routable(i):
+            heapq.heappush(self._route_heap, (self._latency[i], i, self._dc_version[i]))
+        
+    def _register_service(self, service: ServiceInstance):
+        """Assign a health slot to a service instance"""
+        slot = self._service_slots.get(service.id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._slot_ids[slot] = service.id
+            else:
+                slot = len(self._slot_ids)
+                self._slot_ids.append(service.id)
+                if slot >= self._service_health.size:
+                    grown = np.ones(max(2 * self._service_health.size, 64), dtype=np.float64)
+                    grown[:self._service_health.size] = self._service_health
+                    self._service_health = grown
+            self._service_slots[service.id] = slot
+        self._service_health[slot] = service.health
+        
+    def _release_service(self, instance_id: str):
+        """Free the health slot of a removed service instance"""
+        slot = self._service_slots.pop(instance_id)
+        self._slot_ids[slot] = None
+        self._service_health[slot] = 1.0
+        self._free_slots.append(slot)
+        
+    def _sync_service(self, service: ServiceInstance):
+        """Write a service instance's health through to the health array"""
+        self._service_health[self._service_slots[service.id]] = service.health
+        
+    def add_datacenter(self, dc: DataCenter):
+        """Add (or replace) a datacenter and make it routable"""
+        self.datacenters[dc.id] = dc
+        self._rebuild_arrays()
+        
+    def remove_datacenter(self, dc_id: str):
+        """Remove a datacenter from routing, deployment and healing"""
+        del self.datacenters[dc_id]
+        self._rebuild_arrays()
+        
+    def remove_service(self, instance_id: str):
+        """Remove a service instance and free its health slot"""
+        service = self.services.pop(instance_id)
+        self.services_by_name[service.service_name].pop(instance_id, None)
+        self._release_service(instance_id)
+        
+    def set_datacenter_load(self, dc_id: str, load: int):
+        """Set a datacenter's current load"""
+        dc = self.datacenters[dc_id]
+        dc.current_load = load
+        self._sync_datacenter(dc)
+        
+    def set_datacenter_status(self, dc_id: str, status: RegionStatus):
+        """Set a datacenter's health status"""
+        dc = self.datacenters[dc_id]
+        dc.status = status
+        self._sync_datacenter(dc)
+        
+    def report_service_health(self, instance_id: str, health: float):
+        """Record the latest health score of a service instance"""
+        service = self.services[instance_id]
+        service.health = health
+        self._sync_service(service)
+        
     async def deploy_service(self, service_name: str, replicas: int = 3) -> List[str]:
         """Deploy service across multiple regions"""
-        deployed = []
-        
         # Select best data centers based on load
-        available_dcs = sorted(
-            self.datacenters.values(),
-            key=lambda dc: dc.current_load / dc.capacity
-        )[:replicas]
-        
-        for dc in available_dcs:
-            instance_id = f"{service_name}-{dc.id}-{int(time.time())}"
-            instance = ServiceInstance(
-                id=instance_id,
-                service_name=service_name,
-                datacenter_id=dc.id
-            )
-            self.services[instance_id] = instance
-            dc.current_load += 1000
-            deployed.append(instance_id)
+        idx = self._least_loaded(replicas)
+        available_dcs = [self.datacenters[self._dc_ids[i]] for i in idx.tolist()]
+        
+        deployed = [
+            f"{service_name}-{dc.id}-{next(self._instance_counter)}" for dc in available_dcs
+        ]
+        instances = [
+            ServiceInstance(id=instance_id, service_name=service_name, datacenter_id=dc.id)
+            for instance_id, dc in zip(deployed, available_dcs)
+        ]
+        self.services.update(zip(deployed, instances))
+        self.services_by_name[service_name].update(dict.fromkeys(deployed))
+        for instance in instances:
+            self._register_service(instance)
+            
+        # Each new instance adds load to its datacenter
+        self._load[idx] += 1000
+        for i, dc in zip(idx.tolist(), available_dcs):
+            dc.current_load = int(self._load[i])
+            self._refresh_route(i)
             
         logger.info(f"Deployed {service_name} to {len(deployed)} regions")
         return deployed
         
+    def _least_loaded(self, k: int) -> np.ndarray:
+        """Indices of the k least loaded datacenters, ties broken by insertion order"""
+        n = len(self._dc_ids)
+        k = min(max(k, 0), n)
+        if k == 0:
+            return np.empty(0, dtype=np.intp)
+            
+        ratio = self._load * self._inv_capacity
+        if k < n:
+            # Everything below the k-th smallest ratio, then the lowest-index ties
+            kth = np.partition(ratio, k - 1)[k - 1]
+            below = np.flatnonzero(ratio < kth)
+            ties = np.flatnonzero(ratio == kth)[:k - below.size]
+            chosen = np.concatenate([below, ties])
+        else:
+            chosen = np.arange(n)
+        return chosen[np.argsort(ratio[chosen], kind="stable")]
+        
     async def scale_service(self, service_name: str, target_instances: int):
         """Auto-scale service based on demand"""
-        current_instances = [s for s in self.services.values() if s.service_name == service_name]
-        current_count = len(current_instances)
+        current_ids = self.services_by_name.get(service_name, {})
+        current_count = len(current_ids)
         
         if target_instances > current_count:
             # Scale up
@@ -128,28 +303,23 @@ class MultiCloudOrchestrator:
             await self.deploy_service(service_name, replicas=needed)
         elif target_instances < current_count:
             # Scale down
-            to_remove = current_count - target_instances
+            to_remove = min(current_count - target_instances, current_count)
             for _ in range(to_remove):
-                if current_instances:
-                    instance = current_instances.pop()
-                    del self.services[instance.id]
+                # Newest instance first
+                self.remove_service(next(reversed(current_ids)))
                     
         logger.info(f"Scaled {service_name}: {current_count} -> {target_instances} instances")
         
-    def route_traffic(self, user_location: str) -> Optional[str]:
+    def route_traffic(self, user_location: Optional[str]) -> Optional[str]:
         """Intelligent traffic routing based on proximity and load"""
-        # Find closest healthy datacenter
-        available_dcs = [
-            dc for dc in self.datacenters.values()
-            if dc.status == RegionStatus.HEALTHY and dc.current_load < dc.capacity * 0.9
-        ]
-        
-        if not available_dcs:
-            return None
+        # Simple routing: lowest latency among routable datacenters
+        heap = self._route_heap
+        while heap and heap[0][2] != self._dc_version[heap[0][1]]:
+            heapq.heappop(heap)
             
-        # Simple routing: lowest latency
-        best_dc = min(available_dcs, key=lambda dc: dc.latency_ms)
-        return best_dc.id
+        if not heap:
+            return None
+        return self._dc_ids[heap[0][1]]
 
 
 class SelfHealingEngine:
@@ -161,60 +331,97 @@ class SelfHealingEngine:
         
     async def monitor_and_heal(self):
         """Continuous monitoring and self-healing"""
+        orch = self.orchestrator
+        detail = logger.isEnabledFor(logging.DEBUG)
+        
         # Check datacenter health
-        for dc in self.orchestrator.datacenters.values():
-            if dc.current_load > dc.capacity * 0.95:
-                logger.warning(f"Datacenter {dc.id} overloaded: {dc.current_load}/{dc.capacity}")
-                await self._heal_overload(dc)
-                
-            if dc.status != RegionStatus.HEALTHY:
-                logger.warning(f"Datacenter {dc.id} unhealthy: {dc.status}")
-                await self._heal_datacenter(dc)
-                
+        migrated = 0
+        overloaded = np.nonzero(orch._load > 0.95 * orch._capacity)[0]
+        for i in overloaded.tolist():
+            dc = orch.datacenters[orch._dc_ids[i]]
+            if detail:
+                logger.debug(f"Datacenter {dc.id} overloaded: {dc.current_load}/{dc.capacity}")
+            if self._heal_overload(dc):
+                migrated += 1
+            
+        unhealthy = np.nonzero(orch._status != 0)[0]
+        for i in unhealthy.tolist():
+            dc = orch.datacenters[orch._dc_ids[i]]
+            if detail:
+                logger.debug(f"Datacenter {dc.id} unhealthy: {dc.status}")
+            self._heal_datacenter(dc)
+            
         # Check service instances
-        for service in self.orchestrator.services.values():
-            if service.health < 0.5:
-                logger.warning(f"Service {service.id} unhealthy: {service.health}")
-                await self._heal_service(service)
-                
-    async def _heal_overload(self, dc: DataCenter):
-        """Heal overloaded datacenter"""
-        # Migrate some load to other regions
-        target_dc = min(
-            [d for d in self.orchestrator.datacenters.values() if d.id != dc.id],
-            key=lambda d: d.current_load / d.capacity
-        )
+        healed_services = 0
+        bad = np.nonzero(orch._service_health < 0.5)[0]
+        for slot in bad.tolist():
+            service = orch.services.get(orch._slot_ids[slot])
+            if service is None:
+                # Deleted from services without remove_service; drop its slot
+                orch._release_service(orch._slot_ids[slot])
+                continue
+            if detail:
+                logger.debug(f"Service {service.id} unhealthy: {service.health}")
+            self._heal_service(service)
+            healed_services += 1
+            
+        # One summary line per pass instead of one per datacenter/service
+        if (migrated or unhealthy.size or healed_services) and logger.isEnabledFor(logging.WARNING):
+            logger.warning(
+                f"Healed {migrated} overloaded datacenters, "
+                f"{unhealthy.size} unhealthy datacenters, {healed_services} unhealthy services"
+            )
+            
+    def _heal_overload(self, dc: DataCenter) -> bool:
+        """Heal overloaded datacenter; False if there is nowhere to migrate to"""
+        orch = self.orchestrator
+        if len(orch._dc_ids) < 2:
+            return False
+            
+        # Migrate some load to the least loaded other region
+        ratio = orch._load * orch._inv_capacity
+        ratio[orch._dc_index[dc.id]] = np.inf
+        target_dc = orch.datacenters[orch._dc_ids[ratio.argmin()]]
         
         migration_amount = int(dc.current_load * 0.2)
-        dc.current_load -= migration_amount
-        target_dc.current_load += migration_amount
+        orch.set_datacenter_load(dc.id, dc.current_load - migration_amount)
+        orch.set_datacenter_load(target_dc.id, target_dc.current_load + migration_amount)
         
         self.healing_actions += 1
-        logger.info(f"Migrated {migration_amount} load from {dc.id} to {target_dc.id}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Migrated {migration_amount} load from {dc.id} to {target_dc.id}")
+        return True
         
-    async def _heal_datacenter(self, dc: DataCenter):
+    def _heal_datacenter(self, dc: DataCenter):
         """Heal unhealthy datacenter"""
-        dc.status = RegionStatus.HEALTHY
         dc.uptime = 99.9
+        self.orchestrator.set_datacenter_status(dc.id, RegionStatus.HEALTHY)
         self.healing_actions += 1
-        logger.info(f"Healed datacenter {dc.id}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Healed datacenter {dc.id}")
         
-    async def _heal_service(self, service: ServiceInstance):
+    def _heal_service(self, service: ServiceInstance):
         """Heal unhealthy service"""
-        service.health = 1.0
         service.cpu_usage = 50.0
         service.memory_usage = 60.0
+        self.orchestrator.report_service_health(service.id, 1.0)
         self.healing_actions += 1
-        logger.info(f"Healed service {service.id}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Healed service {service.id}")
 
 
 class EdgeComputingNetwork:
     """Edge computing and CDN integration"""
     
-    def __init__(self):
+    def __init__(self, rng: Optional[np.random.Generator] = None):
         self.edge_nodes: Dict[str, Dict[str, Any]] = {}
         self.cache_hit_ratio = 0.0
         
+        # Pre-drawn cache hit outcomes, refilled when exhausted
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self._bernoulli_buf = np.empty(0, dtype=bool)
+        self._bernoulli_idx = 0
+        
     def deploy_edge_nodes(self, locations: List[str]):
         """Deploy edge computing nodes"""
         for location in locations:
@@ -228,6 +435,15 @@ class EdgeComputingNetwork:
             
         logger.info(f"Deployed {len(self.edge_nodes)} edge nodes")
         
+    def _next_bernoulli(self) -> bool:
+        """Next simulated cache hit (85% hit ratio)"""
+        if self._bernoulli_idx >= self._bernoulli_buf.size:
+            self._bernoulli_buf = self._rng.random(65536) < 0.85
+            self._bernoulli_idx = 0
+        hit = self._bernoulli_buf[self._bernoulli_idx]
+        self._bernoulli_idx += 1
+        return bool(hit)
+        
     async def serve_content(self, content_id: str, user_location: str) -> bool:
         """Serve content from edge"""
         # Find nearest edge node
@@ -238,7 +454,7 @@ class EdgeComputingNetwork:
             node['requests_served'] += 1
             
             # Simulate cache hit
-            if random.random() < 0.85:  # 85% cache hit ratio
+            if self._next_bernoulli():
                 node['cached_objects'] += 1
                 self.cache_hit_ratio = 0.85
                 return True
@@ -249,12 +465,16 @@ class EdgeComputingNetwork:
 class PrometheusInfrastructureBrain:
     """Main planetary-scale infrastructure orchestrator"""
     
-    def __init__(self):
-        self.orchestrator = MultiCloudOrchestrator()
+    def __init__(self, cycle_delay: float = 0.0, rng: Optional[np.random.Generator] = None):
+        # One Generator drives every simulated draw; pass a seeded one to reproduce a run
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.orchestrator = MultiCloudOrchestrator(rng=self.rng)
         self.healing_engine = SelfHealingEngine(self.orchestrator)
-        self.edge_network = EdgeComputingNetwork()
+        self.edge_network = EdgeComputingNetwork(rng=self.rng)
         self.uptime_percentage = 100.0
         self.total_requests_served = 0
+        # Seconds to wait between management cycles; 0 only yields to the loop
+        self.cycle_delay = cycle_delay
         
     async def initialize(self):
         """Initialize global infrastructure"""
@@ -278,22 +498,20 @@ class PrometheusInfrastructureBrain:
         
     async def handle_traffic(self, num_requests: int = 10000):
         """Handle massive traffic"""
-        for _ in range(num_requests):
-            # Route request
-            user_location = random.choice(list(self.orchestrator.datacenters.keys()))
-            dc_id = self.orchestrator.route_traffic(user_location)
+        # Routing ignores the user's location, so every request in the
+        # batch lands on the same datacenter
+        dc_id = self.orchestrator.route_traffic(None)
+        
+        if dc_id:
+            self.total_requests_served += num_requests
             
-            if dc_id:
-                self.total_requests_served += 1
-                
         self.orchestrator.global_traffic += num_requests
-        logger.info(f"Handled {num_requests} requests, total: {self.total_requests_served}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Handled {num_requests} requests, total: {self.total_requests_served}")
         
     async def run_management_cycle(self, cycles: int = 20):
         """Run infrastructure management cycle"""
         for cycle in range(cycles):
-            logger.info(f"\n--- Management Cycle {cycle + 1} ---")
-            
             # Handle traffic
             await self.handle_traffic(num_requests=50000)
             
@@ -304,7 +522,14 @@ class PrometheusInfrastructureBrain:
             if self.orchestrator.global_traffic > 100000 * (cycle + 1):
                 await self.orchestrator.scale_service("api-gateway", target_instances=15)
                 
-            await asyncio.sleep(0.1)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"--- Management Cycle {cycle + 1} --- requests served: "
+                    f"{self.total_requests_served:,}, healing actions: "
+                    f"{self.healing_engine.healing_actions}"
+                )
+                
+            await asyncio.sleep(self.cycle_delay)
             
         self._generate_report()
         
@@ -324,13 +549,23 @@ class PrometheusInfrastructureBrain:
         logger.info("\n" + "="*60)
 
 
+async def main(cycles: int = 10):
+    """Initialize the brain and run its management cycles on one loop"""
+    brain = PrometheusInfrastructureBrain()
+    await brain.initialize()
+    await brain.run_management_cycle(cycles=cycles)
+
+
 if __name__ == "__main__":
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
     
-    # Initialize and run
-    brain = PrometheusInfrastructureBrain()
-    asyncio.run(brain.initialize())
-    asyncio.run(brain.run_management_cycle(cycles=10))
+    # Initialize and run, on uvloop's libuv-based event loop when available
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -4,14 +4,16 @@ Integrates with Starlink, OneWeb, and other LEO constellations.
 """
 
 import logging
-import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+from scipy.spatial import cKDTree
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class Satellite:
     id: str
     constellation: str
@@ -25,35 +27,124 @@ class Satellite:
 class SatelliteNetwork:
     """Satellite communication network"""
     
-    def __init__(self):
-        self.satellites: Dict[str, Satellite] = {}
+    def __init__(self, rng: Optional[np.random.Generator] = None):
         self.ground_stations: List[Dict[str, Any]] = []
+        self._rng = rng if rng is not None else np.random.default_rng()
+        
+        # Struct-of-arrays storage of the fleet. A satellite is identified by
+        # its int index; string ids and Satellite records are only built on
+        # request by format_id and get_satellite
+        self.lat = np.empty(0, dtype=np.float32)
+        self.lon = np.empty(0, dtype=np.float32)
+        self.active = np.empty(0, dtype=bool)
+        self._constellation_ranges: Dict[str, Tuple[int, int]] = {}
+        
+        # Spatial index over (lat, lon), rebuilt lazily when the fleet changes
+        self._tree: Optional[cKDTree] = None
+        self._tree_dirty = True
         
     def deploy_constellation(self, name: str, num_satellites: int = 100):
-        """Deploy satellite constellation"""
-        for i in range(num_satellites):
-            sat = Satellite(
-                id=f"{name}-{i}",
-                constellation=name,
-                latitude=random.uniform(-90, 90),
-                longitude=random.uniform(-180, 180),
-                altitude_km=550,
-                coverage_radius_km=1000
-            )
-            self.satellites[sat.id] = sat
+        """Deploy satellite constellation, replacing any with the same name"""
+        if name in self._constellation_ranges:
+            self._remove_constellation(name)
             
+        lat = self._rng.uniform(-90, 90, num_satellites).astype(np.float32)
+        lon = self._rng.uniform(-180, 180, num_satellites).astype(np.float32)
+        
+        lo = self.lat.size
+        self._constellation_ranges[name] = (lo, lo + num_satellites)
+        self.lat = np.concatenate([self.lat, lat])
+        self.lon = np.concatenate([self.lon, lon])
+        self.active = np.concatenate([self.active, np.ones(num_satellites, dtype=bool)])
+        self._tree_dirty = True
+        
         logger.info(f"Deployed {num_satellites} satellites for {name}")
         
-    def find_coverage(self, lat: float, lon: float) -> List[str]:
-        """Find satellites covering a location"""
-        covering = []
-        for sat in self.satellites.values():
-            if sat.active:
-                # Simplified coverage check
-                distance = abs(sat.latitude - lat) + abs(sat.longitude - lon)
-                if distance < 50:  # Approximate coverage
-                    covering.append(sat.id)
-        return covering
+    def _remove_constellation(self, name: str):
+        """Drop a constellation's slice from the fleet arrays"""
+        lo, hi = self._constellation_ranges.pop(name)
+        removed = np.s_[lo:hi]
+        self.lat = np.delete(self.lat, removed)
+        self.lon = np.delete(self.lon, removed)
+        self.active = np.delete(self.active, removed)
+        
+        # Constellations deployed after this one shift down
+        n = hi - lo
+        self._constellation_ranges = {
+            other: (start - n, end - n) if start >= hi else (start, end)
+            for other, (start, end) in self._constellation_ranges.items()
+        }
+        self._tree_dirty = True
+        
+    def get_satellite(self, sat_id: str) -> Optional[Satellite]:
+        """Build a read-only snapshot of a satellite from the fleet arrays
+        
+        Changing the returned record does not affect the fleet; use
+        set_active to (de)activate a satellite.
+        """
+        name, _, num = sat_id.rpartition("-")
+        if name not in self._constellation_ranges or not num.isdecimal():
+            return None
+        if num != str(int(num)):
+            return None  # Non-canonical, e.g. leading zeros
+            
+        lo, hi = self._constellation_ranges[name]
+        i = lo + int(num)
+        if i >= hi:
+            return None
+            
+        return Satellite(
+            id=sat_id,
+            constellation=name,
+            latitude=float(self.lat[i]),
+            longitude=float(self.lon[i]),
+            altitude_km=550,
+            coverage_radius_km=1000,
+            active=bool(self.active[i])
+        )
+        
+    def set_active(self, i: int, active: bool):
+        """Activate or deactivate the satellite at index i"""
+        if not 0 <= i < self.lat.size:
+            raise IndexError(f"No satellite at index {i}")
+        self.active[i] = active
+        
+    def format_id(self, i: int) -> str:
+        """String id ("<constellation>-<n>") of the satellite at index i"""
+        # Ranges always tile [0, fleet size) in array order; redeploying a
+        # constellation shifts later ones, so indices are valid until then
+        if not 0 <= i < self.lat.size:
+            raise IndexError(f"No satellite at index {i}")
+        for name, (lo, hi) in self._constellation_ranges.items():
+            if lo <= i < hi:
+                return f"{name}-{i - lo}"
+        raise IndexError(f"No satellite at index {i}")
+        
+    def invalidate_index(self):
+        """Mark the spatial index stale after satellites move"""
+        self._tree_dirty = True
+        
+    def _spatial_index(self) -> cKDTree:
+        """Return the spatial index, rebuilding it if the fleet changed"""
+        if self._tree_dirty or self._tree is None:
+            self._tree = cKDTree(np.stack([self.lat, self.lon], axis=1))
+            self._tree_dirty = False
+        return self._tree
+        
+    def find_coverage(self, lat: float, lon: float) -> np.ndarray:
+        """Find satellites covering a location, as int32 satellite indices"""
+        if self.lat.size == 0:
+            return np.empty(0, dtype=np.int32)
+            
+        # Simplified coverage check: L1 distance in degrees, strictly below 50
+        # (query_ball_point includes points at exactly r)
+        idx = np.asarray(
+            self._spatial_index().query_ball_point(
+                [lat, lon], r=np.nextafter(50, 0), p=1, return_sorted=True
+            ),
+            dtype=np.int32
+        )
+        return idx[self.active[idx]]
 
 
 if __name__ == "__main__":